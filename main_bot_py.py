@@ -7,10 +7,12 @@ Continuously learning AI agent for BTCUSDT analysis
 import os
 import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters
 from dotenv import load_dotenv
+import ccxt.async_support as ccxt
 
 from src.researcher import TradingResearcher
 from src.data_collector import DataCollector
@@ -37,28 +39,41 @@ class TradingBot:
         self.token = os.getenv('TELEGRAM_BOT_TOKEN')
         if not self.token:
             raise ValueError("TELEGRAM_BOT_TOKEN environment variable not set")
-        self.researcher = TradingResearcher()
-        self.data_collector = DataCollector()
-        self.ai_analyst = AIAnalyst()
-        self.chart_analyzer = ChartAnalyzer()
+        # One exchange client shared by all components: one HTTP session, one rate limit
+        self.exchange = ccxt.binance({'enableRateLimit': True})
+        # Bounded pool for blocking chart renders and sqlite writes
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='bot-io')
+        # One sqlite connection shared by the collector and the chart analyzer
         self.db = DatabaseManager()
+        self.researcher = TradingResearcher(exchange=self.exchange)
+        self.data_collector = DataCollector(exchange=self.exchange, db=self.db, executor=self._io_pool)
+        self.ai_analyst = AIAnalyst(exchange=self.exchange)
+        self.chart_analyzer = ChartAnalyzer(exchange=self.exchange, db=self.db, executor=self._io_pool)
+        # Strong references to long-running tasks so they are not garbage collected
+        self._background_tasks = set()
         
-        # Initialize components
-        self.setup_components()
+    def _spawn(self, coro):
+        """Schedule a background task and keep a reference until it finishes"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
         
-    def setup_components(self):
-        """Initialize all bot components"""
+    async def setup_components(self, application):
+        """Initialize all bot components once the event loop is running"""
         logger.info("Initializing trading bot components...")
-        asyncio.create_task(self.start_background_tasks())
+        # Compile indicator kernels off the event loop so the first chart is fast
+        self._spawn(asyncio.to_thread(self.chart_analyzer.warmup))
+        self._spawn(asyncio.to_thread(self.ai_analyst.warmup))
+        await self.start_background_tasks()
         
     async def start_background_tasks(self):
         """Start continuous learning and data collection"""
         # Start data collection every 5 minutes
-        asyncio.create_task(self.continuous_data_collection())
+        self._spawn(self.continuous_data_collection())
         # Start research updates every hour
-        asyncio.create_task(self.continuous_research())
+        self._spawn(self.continuous_research())
         # Start model training every 6 hours
-        asyncio.create_task(self.continuous_learning())
+        self._spawn(self.continuous_learning())
         
     async def continuous_data_collection(self):
         """Collect market data continuously"""
@@ -210,9 +225,29 @@ class TradingBot:
         except Exception as e:
             await query.message.reply_text(f"Error fetching research: {e}")
 
+    async def shutdown(self, application):
+        """Release network resources on bot shutdown"""
+        # Stop the background loops before the resources they use are closed
+        for task in self._background_tasks:
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        await self.exchange.close()
+        await self.ai_analyst.aclose()
+        await self.researcher.aclose()
+        self._io_pool.shutdown(wait=True)
+        await self.data_collector.aclose()
+        await self.chart_analyzer.aclose()
+        self.db.close()
+
     def run(self):
         """Start the bot"""
-        app = Application.builder().token(self.token).build()
+        app = (
+            Application.builder()
+            .token(self.token)
+            .post_init(self.setup_components)
+            .post_shutdown(self.shutdown)
+            .build()
+        )
         
         # Add handlers
         app.add_handler(CommandHandler("start", self.start))
@@ -2,58 +2,200 @@
 AI Analyst - Uses local LLM for market analysis and predictions
 """
 
-import requests
-import json
+import asyncio
+import aiohttp
+import hashlib
+import orjson
 import pandas as pd
 import numpy as np
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-import ccxt
+import ccxt.async_support as ccxt
 import talib
+from . import indicators_nb
+from .circuit_breaker import AsyncCircuitBreaker
 import logging
 from typing import Dict, List
 
 logger = logging.getLogger(__name__)
 
+# Returned by analyze_with_llm when the LLM is unreachable; never cached
+_LLM_FALLBACK = {
+    "technical_summary": "Technical analysis temporarily unavailable",
+    "price_action": "Price action analysis pending",
+    "entry_levels": "Entry levels calculating...",
+    "exit_levels": "Exit levels calculating...",
+    "risk_assessment": "Risk assessment in progress",
+    "confidence": "50",
+    "bias": "neutral"
+}
+
 class AIAnalyst:
-    def __init__(self):
-        self.exchange = ccxt.binance()
+    def __init__(self, exchange=None):
+        # Only close the exchange on shutdown if this analyst created it
+        self._owns_exchange = exchange is None
+        self.exchange = exchange if exchange is not None else ccxt.binance({'enableRateLimit': True})
         self.ollama_url = "http://localhost:11434/api/generate"
         self.model = "llama3.1:8b"
         self.analysis_cache = {}
+        self._session = None
+        
+        # Recently fetched OHLCV frames keyed by (symbol, timeframe, limit)
+        self._ohlcv_cache = {}
+        self._ohlcv_cache_ttl = 60
+        
+        # Indicator frames keyed by (timeframe, bar count, last bar timestamp and values)
+        self._indicator_cache = OrderedDict()
+        self._indicator_cache_size = 4
+        
+        # Recent LLM responses keyed by a stable prompt digest, oldest first
+        self._llm_cache = OrderedDict()
+        self._llm_cache_size = 128
+        self._llm_cache_ttl = 600
+        
+        # Fail fast while Ollama is down instead of waiting on every request
+        self._llm_breaker = AsyncCircuitBreaker('LLM')
+        
+    async def _get_session(self):
+        """Return the keep-alive HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=75)
+            )
+        return self._session
+        
+    async def aclose(self):
+        """Close the HTTP session and the exchange session it owns"""
+        if self._session is not None:
+            await self._session.close()
+        if self._owns_exchange:
+            await self.exchange.close()
+            
+    def warmup(self):
+        """Compile the Numba pivot and prediction kernels before the first request"""
+        x = np.arange(1.0, 65.0)
+        indicators_nb.pivots(x, x, x)
+        indicators_nb.blend_predictions(1.0, x, x, x, 50.0, 0.0)
+        
+    @staticmethod
+    def _llm_cache_key(prompt):
+        """Stable digest of a prompt (unlike hash(), not salted per process)"""
+        return "llm:" + hashlib.blake2b(prompt.encode('utf-8'), digest_size=16).hexdigest()
+        
+    def _llm_cache_lookup(self, key):
+        """Return a cached LLM response if it is still fresh"""
+        entry = self._llm_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if time.monotonic() - stored_at > self._llm_cache_ttl:
+            del self._llm_cache[key]
+            return None
+        self._llm_cache.move_to_end(key)
+        return response
+        
+    def _llm_cache_store(self, key, response):
+        """Cache an LLM response, evicting the least recently used entry when full"""
+        self._llm_cache[key] = (time.monotonic(), response)
+        self._llm_cache.move_to_end(key)
+        if len(self._llm_cache) > self._llm_cache_size:
+            self._llm_cache.popitem(last=False)
+            
+    async def _ollama_generate(self, prompt, options=None):
+        """Send a prompt to Ollama and return the response text"""
+        payload = {'model': self.model, 'prompt': prompt, 'stream': False}
+        if options:
+            payload['options'] = options
+            
+        return await self._llm_breaker.call(self._post_generate, payload)
+            
+    async def _post_generate(self, payload):
+        """POST a generate request to Ollama and return the response text"""
+        session = await self._get_session()
+        async with session.post(self.ollama_url, json=payload) as response:
+            if response.status != 200:
+                raise Exception(f"LLM request failed: {response.status}")
+            return orjson.loads(await response.read())['response']
         
     async def get_market_data(self, symbol='BTC/USDT', timeframe='1h', limit=100):
-        """Get market data from exchange"""
+        """Get market data from exchange, reusing a fetch from the last minute"""
         try:
-            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+            # Back-to-back polls (analysis, predictions) share one exchange round trip
+            cache_key = (symbol, timeframe, limit)
+            cached = self._ohlcv_cache.get(cache_key)
+            if cached is not None and time.monotonic() - cached[0] < self._ohlcv_cache_ttl:
+                return cached[1]
+                
+            ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            # Convert once to a typed array so pandas skips per-column dtype inference.
+            # Timestamps stay int64 epoch ms; only displayed values are converted.
+            arr = np.asarray(ohlcv, dtype=np.float64)
+            df = pd.DataFrame({
+                'timestamp': arr[:, 0].astype(np.int64),
+                'open': arr[:, 1],
+                'high': arr[:, 2],
+                'low': arr[:, 3],
+                'close': arr[:, 4],
+                'volume': arr[:, 5]
+            })
+            self._ohlcv_cache[cache_key] = (time.monotonic(), df)
             return df
         except Exception as e:
             logger.error(f"Error fetching market data: {e}")
             return None
             
-    def calculate_technical_indicators(self, df):
-        """Calculate technical indicators"""
+    @staticmethod
+    def _bar_key(df):
+        """Identity of the last bar: its open time plus its values, since it is still forming"""
+        return (
+            int(df['timestamp'].iat[-1]),
+            float(df['open'].iat[-1]), float(df['high'].iat[-1]), float(df['low'].iat[-1]),
+            float(df['close'].iat[-1]), float(df['volume'].iat[-1])
+        )
+        
+    def calculate_technical_indicators(self, df, timeframe=None):
+        """Calculate technical indicators, reusing the result for identical input"""
         try:
+            cache_key = None
+            if timeframe is not None:
+                cache_key = (timeframe, len(df)) + self._bar_key(df)
+                cached = self._indicator_cache.get(cache_key)
+                if cached is not None:
+                    self._indicator_cache.move_to_end(cache_key)
+                    return cached.copy(deep=False)
+                    
+            # Contiguous float64 buffers go straight into TA-Lib's C entry points
+            close = np.ascontiguousarray(df['close'].to_numpy(), dtype=np.float64)
+            high = np.ascontiguousarray(df['high'].to_numpy(), dtype=np.float64)
+            low = np.ascontiguousarray(df['low'].to_numpy(), dtype=np.float64)
+            volume = np.ascontiguousarray(df['volume'].to_numpy(), dtype=np.float64)
+            cols = {}
+            
             # Price-based indicators
-            df['sma_20'] = talib.SMA(df['close'], timeperiod=20)
-            df['ema_12'] = talib.EMA(df['close'], timeperiod=12)
-            df['ema_26'] = talib.EMA(df['close'], timeperiod=26)
-            df['rsi'] = talib.RSI(df['close'], timeperiod=14)
-            df['macd'], df['macd_signal'], df['macd_hist'] = talib.MACD(df['close'])
+            cols['sma_20'] = talib.SMA(close, timeperiod=20)
+            cols['ema_12'] = talib.EMA(close, timeperiod=12)
+            cols['ema_26'] = talib.EMA(close, timeperiod=26)
+            cols['rsi'] = talib.RSI(close, timeperiod=14)
+            cols['macd'], cols['macd_signal'], cols['macd_hist'] = talib.MACD(close)
             
             # Bollinger Bands
-            df['bb_upper'], df['bb_middle'], df['bb_lower'] = talib.BBANDS(df['close'])
+            cols['bb_upper'], cols['bb_middle'], cols['bb_lower'] = talib.BBANDS(close)
             
             # Volume indicators
-            df['volume_sma'] = talib.SMA(df['volume'], timeperiod=20)
+            cols['volume_sma'] = talib.SMA(volume, timeperiod=20)
             
-            # Support/Resistance levels
-            df['pivot'] = (df['high'] + df['low'] + df['close']) / 3
-            df['r1'] = 2 * df['pivot'] - df['low']
-            df['s1'] = 2 * df['pivot'] - df['high']
+            # Support/Resistance levels in one fused pass
+            cols['pivot'], cols['r1'], cols['s1'] = indicators_nb.pivots(high, low, close)
             
-            return df
+            # Build the indicators as one float64 block and attach it in a single concat
+            result = pd.concat([df, pd.DataFrame(cols, index=df.index)], axis=1)
+            
+            if cache_key is not None:
+                self._indicator_cache[cache_key] = result
+                if len(self._indicator_cache) > self._indicator_cache_size:
+                    self._indicator_cache.popitem(last=False)
+            return result
         except Exception as e:
             logger.error(f"Error calculating indicators: {e}")
             return df
@@ -63,9 +205,9 @@ class AIAnalyst:
         patterns = []
         
         try:
-            # Simple pattern recognition
-            latest = df.iloc[-1]
-            prev = df.iloc[-2]
+            # Simple pattern recognition on scalar reads of the last bar
+            latest = {col: df[col].iat[-1] for col in
+                      ('open', 'high', 'low', 'close', 'volume', 'rsi', 'bb_upper', 'bb_lower', 'volume_sma')}
             
             # Doji detection
             body_size = abs(latest['close'] - latest['open'])
@@ -95,17 +237,15 @@ class AIAnalyst:
             logger.error(f"Error identifying patterns: {e}")
             return ["Pattern analysis error"]
             
-    async def analyze_with_llm(self, market_data, indicators, patterns):
+    async def analyze_with_llm(self, latest: Dict, prev_24h_close: float, patterns: List[str]):
         """Analyze market data using local LLM"""
         try:
-            latest = market_data.iloc[-1]
-            
             prompt = f"""
 You are an expert cryptocurrency trader analyzing BTCUSDT. 
 
 Current Market Data:
 - Price: ${latest['close']:.2f}
-- 24h Change: {((latest['close'] - market_data.iloc[-24]['close']) / market_data.iloc[-24]['close'] * 100):.2f}%
+- 24h Change: {((latest['close'] - prev_24h_close) / prev_24h_close * 100):.2f}%
 - RSI: {latest['rsi']:.1f}
 - MACD: {latest['macd']:.4f}
 - Volume: {latest['volume']:,.0f}
@@ -130,68 +270,64 @@ Provide analysis in this JSON format:
 }}
             """
             
-            response = requests.post(self.ollama_url, json={
-                'model': self.model,
-                'prompt': prompt,
-                'stream': False,
-                'options': {'temperature': 0.1}  # Low temperature for consistent analysis
-            })
-            
-            if response.status_code == 200:
-                llm_response = response.json()['response']
-                # Try to extract JSON from response
-                try:
-                    # Find JSON in response
-                    start = llm_response.find('{')
-                    end = llm_response.rfind('}') + 1
-                    if start != -1 and end != 0:
-                        analysis_json = json.loads(llm_response[start:end])
-                        return analysis_json
-                except:
-                    # Fallback to structured text parsing
-                    pass
-                    
-                # Fallback structured response
-                return {
-                    "technical_summary": llm_response[:200] + "...",
-                    "price_action": "Analysis in progress",
-                    "entry_levels": f"Watch ${latest['s1']:.2f} support",
-                    "exit_levels": f"Target ${latest['r1']:.2f} resistance", 
-                    "risk_assessment": "Moderate risk",
-                    "confidence": "75",
-                    "bias": "neutral"
-                }
-            else:
-                raise Exception(f"LLM request failed: {response.status_code}")
+            # Identical prompts (same bar, same indicators) reuse the previous answer
+            cache_key = self._llm_cache_key(prompt)
+            llm_response = self._llm_cache_lookup(cache_key)
+            if llm_response is None:
+                # Low temperature for consistent analysis
+                llm_response = await self._ollama_generate(prompt, {'temperature': 0.1})
+                self._llm_cache_store(cache_key, llm_response)
                 
-        except Exception as e:
-            logger.error(f"LLM analysis error: {e}")
+            # Try to extract JSON from response
+            try:
+                # Find JSON in response
+                start = llm_response.find('{')
+                end = llm_response.rfind('}') + 1
+                if start != -1 and end != 0:
+                    analysis_json = orjson.loads(llm_response[start:end])
+                    return analysis_json
+            except:
+                # Fallback to structured text parsing
+                pass
+                
+            # Fallback structured response
             return {
-                "technical_summary": "Technical analysis temporarily unavailable",
-                "price_action": "Price action analysis pending",
-                "entry_levels": "Entry levels calculating...",
-                "exit_levels": "Exit levels calculating...",
-                "risk_assessment": "Risk assessment in progress",
-                "confidence": "50",
+                "technical_summary": llm_response[:200] + "...",
+                "price_action": "Analysis in progress",
+                "entry_levels": f"Watch ${latest['s1']:.2f} support",
+                "exit_levels": f"Target ${latest['r1']:.2f} resistance", 
+                "risk_assessment": "Moderate risk",
+                "confidence": "75",
                 "bias": "neutral"
             }
+                
+        except Exception as e:
+            logger.error(f"LLM analysis error: {e}")
+            return _LLM_FALLBACK
             
     async def get_current_analysis(self):
         """Get current market analysis"""
         try:
-            # Get fresh market data
-            df = await self.get_market_data()
+            # Get fresh market data; same window as predictions so indicators are shared
+            df = await self.get_market_data(timeframe='1h', limit=168)
             if df is None:
                 raise Exception("Failed to fetch market data")
                 
+            # Indicators, patterns and the LLM view only change when the bars do
+            bar_key = self._bar_key(df)
+            if self.analysis_cache.get('bar_key') == bar_key:
+                return self.analysis_cache['current']
+                
             # Calculate indicators
-            df = self.calculate_technical_indicators(df)
+            df = self.calculate_technical_indicators(df, timeframe='1h')
             
             # Identify patterns
             patterns = self.identify_patterns(df)
             
-            # Get LLM analysis
-            llm_analysis = await self.analyze_with_llm(df, df.iloc[-1], patterns)
+            # Get LLM analysis from the last bar's scalars only
+            latest = df.iloc[-1].to_dict()
+            prev_close = float(df['close'].iat[-24])
+            llm_analysis = await self.analyze_with_llm(latest, prev_close, patterns)
             
             # Combine all analysis
             analysis = {
@@ -203,9 +339,11 @@ Provide analysis in this JSON format:
                 'bias': llm_analysis.get('bias', 'neutral')
             }
             
-            # Cache analysis
-            self.analysis_cache['current'] = analysis
-            self.analysis_cache['timestamp'] = datetime.now()
+            # Cache analysis, unless the LLM was unavailable and this is only the fallback
+            if llm_analysis is not _LLM_FALLBACK:
+                self.analysis_cache['current'] = analysis
+                self.analysis_cache['bar_key'] = bar_key
+                self.analysis_cache['timestamp'] = datetime.now()
             
             return analysis
             
@@ -223,12 +361,16 @@ Provide analysis in this JSON format:
     async def get_price_predictions(self):
         """Generate price predictions using AI analysis"""
         try:
-            # Get multiple timeframe data
-            df_1h = await self.get_market_data(timeframe='1h', limit=168)  # 1 week
-            df_4h = await self.get_market_data(timeframe='4h', limit=168)  # 4 weeks
-            df_1d = await self.get_market_data(timeframe='1d', limit=100)  # 100 days
+            # Get multiple timeframe data, fetched concurrently
+            df_1h, df_4h, df_1d = await asyncio.gather(
+                self.get_market_data(timeframe='1h', limit=168),  # 1 week
+                self.get_market_data(timeframe='4h', limit=168),  # 4 weeks
+                self.get_market_data(timeframe='1d', limit=100)   # 100 days
+            )
+            if df_1h is None or df_4h is None or df_1d is None:
+                raise Exception("Failed to fetch market data")
             
-            current_price = df_1h['close'].iloc[-1]
+            current_price = df_1h['close'].iat[-1]
             
             # Calculate prediction factors
             predictions = await self.calculate_predictions(df_1h, df_4h, df_1d, current_price)
@@ -249,25 +391,23 @@ Provide analysis in this JSON format:
         """Calculate price predictions using multiple methods"""
         try:
             # Technical analysis based predictions
-            df_1h = self.calculate_technical_indicators(df_1h)
-            
-            # Simple momentum prediction
-            momentum_1h = (df_1h['close'].iloc[-1] - df_1h['close'].iloc[-12]) / df_1h['close'].iloc[-12]
-            momentum_4h = (df_4h['close'].iloc[-1] - df_4h['close'].iloc[-6]) / df_4h['close'].iloc[-6]
-            momentum_1d = (df_1d['close'].iloc[-1] - df_1d['close'].iloc[-7]) / df_1d['close'].iloc[-7]
-            
-            # RSI based prediction
-            rsi = df_1h['rsi'].iloc[-1]
-            rsi_factor = (50 - rsi) / 100  # Contrarian approach
+            df_1h = self.calculate_technical_indicators(df_1h, timeframe='1h')
             
-            # MACD based prediction
-            macd_signal = df_1h['macd'].iloc[-1] - df_1h['macd_signal'].iloc[-1]
-            macd_factor = np.tanh(macd_signal * 1000) * 0.02  # Small influence
-            
-            # Combine predictions
-            pred_1h = current_price * (1 + (momentum_1h * 0.3) + (rsi_factor * 0.1) + (macd_factor * 0.1))
-            pred_4h = current_price * (1 + (momentum_4h * 0.5) + (rsi_factor * 0.2) + (macd_factor * 0.2))
-            pred_24h = current_price * (1 + (momentum_1d * 0.7) + (rsi_factor * 0.3) + (macd_factor * 0.3))
+            # The kernel indexes without bounds checks, so reject series too short for the lookbacks
+            for name, frame, lookback in (('1h', df_1h, 12), ('4h', df_4h, 6), ('1d', df_1d, 7)):
+                if len(frame) < lookback:
+                    raise IndexError(f"Need {lookback} {name} bars for predictions, got {len(frame)}")
+                    
+            # Momentum per timeframe, contrarian RSI and a small MACD influence, blended in one kernel
+            macd_signal = df_1h['macd'].iat[-1] - df_1h['macd_signal'].iat[-1]
+            pred_1h, pred_4h, pred_24h = indicators_nb.blend_predictions(
+                float(current_price),
+                df_1h['close'].to_numpy(dtype=np.float64),
+                df_4h['close'].to_numpy(dtype=np.float64),
+                df_1d['close'].to_numpy(dtype=np.float64),
+                float(df_1h['rsi'].iat[-1]),
+                float(macd_signal)
+            )
             
             # Calculate changes
             change_1h = ((pred_1h - current_price) / current_price) * 100
@@ -322,33 +462,23 @@ Provide analysis in this JSON format:
     async def backtest_predictions(self, df):
         """Backtest prediction accuracy"""
         try:
-            correct_predictions = 0
-            total_predictions = 0
-            
-            # Test on last 100 periods
-            for i in range(len(df) - 100, len(df) - 1):
-                # Make prediction based on data up to point i
-                historical_data = df.iloc[:i]
-                actual_future = df.iloc[i + 1]['close']
-                
-                # Simple prediction: if RSI < 30, predict up; if RSI > 70, predict down
-                rsi = historical_data['rsi'].iloc[-1]
-                current_price = historical_data['close'].iloc[-1]
-                
-                if rsi < 30:  # Oversold, predict up
-                    predicted_direction = 1
-                elif rsi > 70:  # Overbought, predict down
-                    predicted_direction = -1
-                else:
-                    continue  # Skip neutral signals
-                    
-                # Check if prediction was correct
-                actual_direction = 1 if actual_future > current_price else -1
-                if predicted_direction == actual_direction:
-                    correct_predictions += 1
-                total_predictions += 1
-                
-            accuracy = (correct_predictions / total_predictions * 100) if total_predictions > 0 else 0
+            rsi = df['rsi'].to_numpy()
+            close = df['close'].to_numpy()
+            
+            # Test on last 100 periods: the signal at bar i-1 predicts bar i+1
+            signal_rsi = rsi[-101:-2]
+            current_price = close[-101:-2]
+            actual_future = close[-99:]
+            
+            # Simple prediction: if RSI < 30, predict up; if RSI > 70, predict down
+            predicted_direction = np.where(signal_rsi < 30, 1, np.where(signal_rsi > 70, -1, 0))
+            actual_direction = np.where(actual_future > current_price, 1, -1)
+            
+            # Skip neutral signals
+            mask = predicted_direction != 0
+            if not mask.any():
+                return 0
+            accuracy = (predicted_direction[mask] == actual_direction[mask]).mean() * 100
             return accuracy
             
         except Exception as e:
@@ -373,8 +503,9 @@ Provide analysis in this JSON format:
                 'model_version': '1.0'
             }
             
-            with open('data/model_params.json', 'w') as f:
-                json.dump(params, f, indent=2)
+            buf = orjson.dumps(params, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+            with open('data/model_params.json', 'wb') as f:
+                f.write(buf)
                 
         except Exception as e:
             logger.error(f"Error updating model parameters: {e}")
@@ -382,28 +513,35 @@ Provide analysis in this JSON format:
     def get_fair_value_gaps(self, df):
         """Identify Fair Value Gaps (FVG) in price action"""
         try:
-            fvgs = []
+            high = df['high'].to_numpy()
+            low = df['low'].to_numpy()
+            timestamps = df['timestamp'].to_numpy()
+            
+            # Compare each candle with the one two bars earlier via shifted views
+            # Bullish FVG: previous low > next high
+            bullish = low[:-2] > high[2:]
+            # Bearish FVG: previous high < next low
+            bearish = high[:-2] < low[2:]
             
-            for i in range(2, len(df)):
-                # Bullish FVG: previous low > next high
-                if df.iloc[i-2]['low'] > df.iloc[i]['high']:
+            fvgs = []
+            for j in np.flatnonzero(bullish | bearish)[-5:]:  # Last 5 FVGs
+                i = j + 2
+                if bullish[j]:
                     fvgs.append({
                         'type': 'bullish',
-                        'top': df.iloc[i-2]['low'],
-                        'bottom': df.iloc[i]['high'],
-                        'timestamp': df.iloc[i]['timestamp']
+                        'top': low[j],
+                        'bottom': high[i],
+                        'timestamp': pd.Timestamp(int(timestamps[i]), unit='ms')
                     })
-                    
-                # Bearish FVG: previous high < next low  
-                elif df.iloc[i-2]['high'] < df.iloc[i]['low']:
+                else:
                     fvgs.append({
                         'type': 'bearish',
-                        'top': df.iloc[i]['low'],
-                        'bottom': df.iloc[i-2]['high'],
-                        'timestamp': df.iloc[i]['timestamp']
+                        'top': low[i],
+                        'bottom': high[j],
+                        'timestamp': pd.Timestamp(int(timestamps[i]), unit='ms')
                     })
                     
-            return fvgs[-5:]  # Return last 5 FVGs
+            return fvgs
             
         except Exception as e:
             logger.error(f"Error identifying FVGs: {e}")
@@ -413,20 +551,28 @@ Provide analysis in this JSON format:
         """Analyze order flow patterns"""
         try:
             # Simple order flow analysis using volume and price
-            order_flow = []
-            
-            for i in range(1, len(df)):
-                price_change = df.iloc[i]['close'] - df.iloc[i-1]['close']
-                volume_ratio = df.iloc[i]['volume'] / df.iloc[i-1]['volume'] if df.iloc[i-1]['volume'] > 0 else 1
-                
-                if price_change > 0 and volume_ratio > 1.2:
-                    order_flow.append('Strong buying pressure')
-                elif price_change < 0 and volume_ratio > 1.2:
-                    order_flow.append('Strong selling pressure')
-                elif abs(price_change) < (df.iloc[i]['close'] * 0.001) and volume_ratio > 1.5:
-                    order_flow.append('Absorption (large volume, small price change)')
-                    
-            return order_flow[-3:]  # Return last 3 order flow signals
+            close = df['close'].to_numpy()
+            volume = df['volume'].to_numpy()
+            
+            price_change = np.diff(close)
+            prev_volume = volume[:-1]
+            volume_ratio = np.divide(volume[1:], prev_volume, out=np.ones(len(prev_volume)), where=prev_volume > 0)
+            
+            signals = np.select(
+                [
+                    (price_change > 0) & (volume_ratio > 1.2),
+                    (price_change < 0) & (volume_ratio > 1.2),
+                    (np.abs(price_change) < close[1:] * 0.001) & (volume_ratio > 1.5)
+                ],
+                [
+                    'Strong buying pressure',
+                    'Strong selling pressure',
+                    'Absorption (large volume, small price change)'
+                ],
+                default=''
+            )
+            
+            return signals[signals != ''][-3:].tolist()  # Return last 3 order flow signals
             
         except Exception as e:
             logger.error(f"Error analyzing order flow: {e}")
@@ -7,104 +7,244 @@ import plotly.express as px
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
-from datetime import datetime
-import ccxt
+import ccxt.async_support as ccxt
+import plotly.io.kaleido as pio_kaleido
+import asyncio
+import glob
 import logging
 import os
+import tempfile
+import time
+
+from . import indicators_nb
+from .database import DatabaseManager
 
 logger = logging.getLogger(__name__)
 
 class ChartAnalyzer:
-    def __init__(self):
-        self.exchange = ccxt.binance()
+    def __init__(self, exchange=None, db=None, executor=None):
+        # Only close the exchange and database on shutdown if this analyzer created them
+        self._owns_exchange = exchange is None
+        self._owns_db = db is None
+        self.exchange = exchange if exchange is not None else ccxt.binance({'enableRateLimit': True})
+        self.db = db if db is not None else DatabaseManager()
+        # Thread pool for blocking render/DB work; None uses the loop's default executor
+        self.executor = executor
+        # Plotly's long-lived Kaleido scope (with plotly.js configured) keeps one
+        # Chromium renderer alive across charts
+        self._kaleido = pio_kaleido.scope
+        self._render_lock = asyncio.Semaphore(1)
+        # Last rendered output per chart, keyed by the latest bar it was built from
+        self._chart_cache = {}
+        # Drop temp files left behind by a render interrupted before its rename
+        for stale in glob.glob('data/charts/*.tmp'):
+            try:
+                os.unlink(stale)
+            except OSError:
+                pass
+        # Styled analysis figure skeleton, filled with fresh data on every call
+        self._analysis_template = self._build_analysis_template()
+        
+    async def aclose(self):
+        """Close the exchange session and database connection it owns"""
+        if self._owns_exchange:
+            await self.exchange.close()
+        if self._owns_db:
+            self.db.close()
+        
+    async def _run_io(self, func, *args):
+        """Run blocking work on the executor without stalling the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
         
-    async def generate_analysis_chart(self):
-        """Generate comprehensive analysis chart"""
+    async def _load_ohlcv(self, symbol, timeframe, limit):
+        """Load recent candles from the database, fetching only missing bars from the exchange"""
+        df = await self._run_io(self.db.get_market_data, symbol, timeframe, limit)
+        if df is not None and len(df) >= limit:
+            last_ms = df['timestamp'].iat[-1].value // 1_000_000
+            period_ms = self.exchange.parse_timeframe(timeframe) * 1000
+            if time.time() * 1000 - last_ms < period_ms:
+                return df
+            ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, since=last_ms)
+        else:
+            ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            
+        await self._run_io(self.db.store_market_data, symbol, timeframe, ohlcv)
+        df = await self._run_io(self.db.get_market_data, symbol, timeframe, limit)
+        if df is None or df.empty:
+            raise Exception("Failed to load market data")
+        return df
+        
+    @staticmethod
+    def _bar_key(df):
+        """Identity of the last bar: its open time plus its values, since it is still forming"""
+        return (
+            df['timestamp'].iat[-1].value,
+            float(df['open'].iat[-1]), float(df['high'].iat[-1]), float(df['low'].iat[-1]),
+            float(df['close'].iat[-1]), float(df['volume'].iat[-1])
+        )
+        
+    def _cached_chart(self, name, key):
+        """Return the cached render for this chart if it was built from the same bar"""
+        entry = self._chart_cache.get(name)
+        if entry is None or entry[0] != key:
+            return None
+        result = entry[1]
+        if isinstance(result, str) and result.endswith('.png') and not os.path.exists(result):
+            return None
+        return result
+        
+    def _write_png(self, fig, path, width, height):
+        """Render figure to PNG using the shared Kaleido scope"""
+        image = self._kaleido.transform(fig.to_dict(), format='png', width=width, height=height)
+        # Write beside the target and swap it in, so readers never see a partial PNG
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(image)
+            # mkstemp creates owner-only files; published charts stay world-readable
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+            
+    async def _export(self, fig, path, width, height, render_format, cache_name=None, cache_key=None):
+        """Render off the event loop, one chart at a time through the shared Kaleido scope"""
+        async with self._render_lock:
+            # A concurrent request may have rendered this chart while we waited for the lock
+            if cache_name is not None:
+                cached = self._cached_chart(cache_name, cache_key)
+                if cached is not None:
+                    return cached
+            result = await self._run_io(self._render, fig, path, width, height, render_format)
+            if cache_name is not None:
+                self._chart_cache[cache_name] = (cache_key, result)
+            return result
+            
+    def _render(self, fig, path, width, height, render_format):
+        """Export figure as a PNG file path, SVG bytes or Plotly JSON"""
+        if render_format == 'json':
+            return fig.to_json()
+        if render_format == 'svg':
+            return self._kaleido.transform(fig.to_dict(), format='svg', width=width, height=height)
+        if render_format != 'png':
+            raise ValueError(f"Unsupported render format: {render_format}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write_png(fig, path, width, height)
+        return path
+        
+    def _build_analysis_template(self):
+        """Build the analysis figure layout and styled empty traces once"""
+        fig = make_subplots(
+            rows=3, cols=1,
+            shared_xaxes=True,
+            vertical_spacing=0.02,
+            subplot_titles=('BTCUSDT Price Action', 'Volume', 'RSI'),
+            row_heights=[0.6, 0.2, 0.2]
+        )
+        
+        # Candlestick chart
+        fig.add_trace(
+            go.Candlestick(
+                name='BTCUSDT',
+                increasing_line_color='#00ff88',
+                decreasing_line_color='#ff4444'
+            ),
+            row=1, col=1
+        )
+        
+        # Moving averages
+        fig.add_trace(
+            go.Scatter(mode='lines', name='SMA 20', line=dict(color='orange', width=1)),
+            row=1, col=1
+        )
+        fig.add_trace(
+            go.Scatter(mode='lines', name='EMA 50', line=dict(color='blue', width=1)),
+            row=1, col=1
+        )
+        
+        # Bollinger Bands
+        fig.add_trace(
+            go.Scatter(mode='lines', name='BB Upper', line=dict(color='gray', width=1), fill=None),
+            row=1, col=1
+        )
+        fig.add_trace(
+            go.Scatter(
+                mode='lines',
+                name='BB Lower',
+                line=dict(color='gray', width=1),
+                fill='tonexty',
+                fillcolor='rgba(128,128,128,0.1)'
+            ),
+            row=1, col=1
+        )
+        
+        # Volume
+        fig.add_trace(go.Bar(name='Volume', opacity=0.7), row=2, col=1)
+        
+        # RSI
+        fig.add_trace(
+            go.Scatter(mode='lines', name='RSI', line=dict(color='purple', width=2)),
+            row=3, col=1
+        )
+        
+        # RSI levels
+        fig.add_hline(y=70, line_dash="dash", line_color="red", row=3, col=1)
+        fig.add_hline(y=30, line_dash="dash", line_color="green", row=3, col=1)
+        fig.add_hline(y=50, line_dash="dot", line_color="gray", row=3, col=1)
+        
+        fig.update_layout(
+            title='BTCUSDT Technical Analysis',
+            template='plotly_dark',
+            height=800,
+            showlegend=True,
+            xaxis_rangeslider_visible=False
+        )
+        
+        fig.update_xaxes(title_text="Time", row=3, col=1)
+        fig.update_yaxes(title_text="Price ($)", row=1, col=1)
+        fig.update_yaxes(title_text="Volume", row=2, col=1)
+        fig.update_yaxes(title_text="RSI", row=3, col=1)
+        
+        return fig
+        
+    async def generate_analysis_chart(self, render_format='png'):
+        """Generate comprehensive analysis chart (PNG path, SVG bytes or Plotly JSON)"""
         try:
             # Get market data
-            ohlcv = self.exchange.fetch_ohlcv('BTC/USDT', '1h', limit=168)  # 1 week
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+            df = await self._load_ohlcv('BTC/USDT', '1h', 168)  # 1 week
+            
+            # Skip rebuilding the chart while the bars it is drawn from are unchanged
+            cache_name = ('analysis', render_format)
+            cache_key = ('BTC/USDT', '1h') + self._bar_key(df)
+            cached = self._cached_chart(cache_name, cache_key)
+            if cached is not None:
+                return cached
             
             # Calculate indicators
             df = self.calculate_chart_indicators(df)
             
-            # Create subplots
-            fig = make_subplots(
-                rows=3, cols=1,
-                shared_xaxes=True,
-                vertical_spacing=0.02,
-                subplot_titles=('BTCUSDT Price Action', 'Volume', 'RSI'),
-                row_heights=[0.6, 0.2, 0.2]
-            )
-            
-            # Add candlestick chart
-            fig.add_trace(
-                go.Candlestick(
-                    x=df['timestamp'],
-                    open=df['open'],
-                    high=df['high'],
-                    low=df['low'],
-                    close=df['close'],
-                    name='BTCUSDT',
-                    increasing_line_color='#00ff88',
-                    decreasing_line_color='#ff4444'
-                ),
-                row=1, col=1
-            )
-            
-            # Add moving averages
-            fig.add_trace(
-                go.Scatter(
-                    x=df['timestamp'],
-                    y=df['sma_20'],
-                    mode='lines',
-                    name='SMA 20',
-                    line=dict(color='orange', width=1)
-                ),
-                row=1, col=1
-            )
-            
-            fig.add_trace(
-                go.Scatter(
-                    x=df['timestamp'],
-                    y=df['ema_50'],
-                    mode='lines',
-                    name='EMA 50',
-                    line=dict(color='blue', width=1)
-                ),
-                row=1, col=1
-            )
-            
-            # Add Bollinger Bands
-            fig.add_trace(
-                go.Scatter(
-                    x=df['timestamp'],
-                    y=df['bb_upper'],
-                    mode='lines',
-                    name='BB Upper',
-                    line=dict(color='gray', width=1),
-                    fill=None
-                ),
-                row=1, col=1
-            )
-            
-            fig.add_trace(
-                go.Scatter(
-                    x=df['timestamp'],
-                    y=df['bb_lower'],
-                    mode='lines',
-                    name='BB Lower',
-                    line=dict(color='gray', width=1),
-                    fill='tonexty',
-                    fillcolor='rgba(128,128,128,0.1)'
-                ),
-                row=1, col=1
-            )
+            # Keep the rendered payload bounded for long histories
+            bars, lines = self.downsample(df)
+            
+            # Fill a copy of the prebuilt figure skeleton with this window's data
+            fig = go.Figure(self._analysis_template)
+            x = lines['timestamp']
+            candles, sma_20, ema_50, bb_upper, bb_lower, volume, rsi = fig.data
+            with fig.batch_update():
+                candles.update(x=bars['timestamp'], open=bars['open'], high=bars['high'], low=bars['low'], close=bars['close'])
+                sma_20.update(x=x, y=lines['sma_20'])
+                ema_50.update(x=x, y=lines['ema_50'])
+                bb_upper.update(x=x, y=lines['bb_upper'])
+                bb_lower.update(x=x, y=lines['bb_lower'])
+                colors = np.where(bars['close'].to_numpy() >= bars['open'].to_numpy(), 'green', 'red')
+                volume.update(x=bars['timestamp'], y=bars['volume'], marker_color=colors)
+                rsi.update(x=x, y=lines['rsi'])
             
             # Add support/resistance levels
-            latest_high = df['high'].rolling(20).max().iloc[-1]
-            latest_low = df['low'].rolling(20).min().iloc[-1]
+            latest_high = df['high_20'].iat[-1]
+            latest_low = df['low_20'].iat[-1]
             
             fig.add_hline(
                 y=latest_high,
@@ -122,64 +262,17 @@ class ChartAnalyzer:
                 row=1, col=1
             )
             
-            # Add volume
-            colors = ['green' if close >= open else 'red' for close, open in zip(df['close'], df['open'])]
-            fig.add_trace(
-                go.Bar(
-                    x=df['timestamp'],
-                    y=df['volume'],
-                    name='Volume',
-                    marker_color=colors,
-                    opacity=0.7
-                ),
-                row=2, col=1
-            )
-            
-            # Add RSI
-            fig.add_trace(
-                go.Scatter(
-                    x=df['timestamp'],
-                    y=df['rsi'],
-                    mode='lines',
-                    name='RSI',
-                    line=dict(color='purple', width=2)
-                ),
-                row=3, col=1
-            )
-            
-            # Add RSI levels
-            fig.add_hline(y=70, line_dash="dash", line_color="red", row=3, col=1)
-            fig.add_hline(y=30, line_dash="dash", line_color="green", row=3, col=1)
-            fig.add_hline(y=50, line_dash="dot", line_color="gray", row=3, col=1)
-            
-            # Update layout
-            fig.update_layout(
-                title='BTCUSDT Technical Analysis',
-                template='plotly_dark',
-                height=800,
-                showlegend=True,
-                xaxis_rangeslider_visible=False
-            )
-            
-            fig.update_xaxes(title_text="Time", row=3, col=1)
-            fig.update_yaxes(title_text="Price ($)", row=1, col=1)
-            fig.update_yaxes(title_text="Volume", row=2, col=1)
-            fig.update_yaxes(title_text="RSI", row=3, col=1)
-            
             # Save chart
-            os.makedirs('data/charts', exist_ok=True)
-            chart_path = f'data/charts/btcusdt_analysis_{datetime.now().strftime("%Y%m%d_%H%M")}.png'
-            fig.write_image(chart_path, width=1200, height=800)
-            
-            return chart_path
+            chart_path = 'data/charts/btcusdt_analysis.png'
+            return await self._export(fig, chart_path, 1200, 800, render_format, cache_name, cache_key)
             
         except Exception as e:
             logger.error(f"Error generating analysis chart: {e}")
-            # Return a simple error chart
-            return await self.generate_error_chart()
+            # Return a simple error chart in the format the caller asked for
+            return await self.generate_error_chart(render_format)
             
-    async def generate_error_chart(self):
-        """Generate simple error chart"""
+    async def generate_error_chart(self, render_format='png'):
+        """Generate simple error chart (PNG path, SVG bytes or Plotly JSON)"""
         try:
             fig = go.Figure()
             fig.add_annotation(
@@ -196,45 +289,78 @@ class ChartAnalyzer:
                 title="BTCUSDT Analysis"
             )
             
-            os.makedirs('data/charts', exist_ok=True)
             error_path = 'data/charts/error_chart.png'
-            fig.write_image(error_path, width=600, height=400)
-            return error_path
+            return await self._export(fig, error_path, 600, 400, render_format)
             
         except Exception as e:
             logger.error(f"Error generating error chart: {e}")
             return None
             
+    def warmup(self):
+        """Compile the Numba indicator kernels before the first chart request"""
+        x = np.arange(64, dtype=np.float64)
+        indicators_nb.sma(x, 50)
+        indicators_nb.ema(x, 20)
+        indicators_nb.rsi(x, 14)
+        indicators_nb.window_stats(x, x, x, 20)
+        indicators_nb.macd(x, 12, 26, 9)
+        indicators_nb.lttb_indices(x, 16)
+        
+    def downsample(self, df, max_pts=500):
+        """Bound trace sizes: bucketed OHLCV for bars, LTTB-selected rows for line traces"""
+        n = len(df)
+        if n <= max_pts:
+            return df, df
+            
+        # Candles and volume: aggregate fixed-size buckets so highs/lows survive
+        starts = np.arange(0, n, int(np.ceil(n / max_pts)))
+        ends = np.append(starts[1:], n) - 1
+        bars = pd.DataFrame({
+            'timestamp': df['timestamp'].to_numpy()[starts],
+            'open': df['open'].to_numpy()[starts],
+            'high': np.maximum.reduceat(df['high'].to_numpy(), starts),
+            'low': np.minimum.reduceat(df['low'].to_numpy(), starts),
+            'close': df['close'].to_numpy()[ends],
+            'volume': np.add.reduceat(df['volume'].to_numpy(), starts)
+        })
+        
+        # Line traces: keep the rows that best preserve the shape of the close series
+        close = np.ascontiguousarray(df['close'].to_numpy(), dtype=np.float64)
+        lines = df.iloc[indicators_nb.lttb_indices(close, max_pts)]
+        return bars, lines
+        
     def calculate_chart_indicators(self, df):
         """Calculate indicators for charting"""
         try:
+            close = np.ascontiguousarray(df['close'].to_numpy(), dtype=np.float64)
+            high = np.ascontiguousarray(df['high'].to_numpy(), dtype=np.float64)
+            low = np.ascontiguousarray(df['low'].to_numpy(), dtype=np.float64)
+            
+            # 20-period window: SMA, standard deviation and high/low range
+            sma_20, std_20, high_20, low_20 = indicators_nb.window_stats(close, high, low, 20)
+            
             # Simple moving averages
-            df['sma_20'] = df['close'].rolling(20).mean()
-            df['sma_50'] = df['close'].rolling(50).mean()
+            df['sma_20'] = sma_20
+            df['sma_50'] = indicators_nb.sma(close, 50)
             
             # Exponential moving averages
-            df['ema_20'] = df['close'].ewm(span=20).mean()
-            df['ema_50'] = df['close'].ewm(span=50).mean()
+            df['ema_20'] = indicators_nb.ema(close, 20)
+            df['ema_50'] = indicators_nb.ema(close, 50)
             
             # RSI
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            df['rsi'] = 100 - (100 / (1 + rs))
+            df['rsi'] = indicators_nb.rsi(close, 14)
             
             # Bollinger Bands
-            df['bb_middle'] = df['close'].rolling(20).mean()
-            bb_std = df['close'].rolling(20).std()
-            df['bb_upper'] = df['bb_middle'] + (bb_std * 2)
-            df['bb_lower'] = df['bb_middle'] - (bb_std * 2)
+            df['bb_middle'] = sma_20
+            df['bb_upper'] = sma_20 + (std_20 * 2)
+            df['bb_lower'] = sma_20 - (std_20 * 2)
+            
+            # Rolling support/resistance range
+            df['high_20'] = high_20
+            df['low_20'] = low_20
             
             # MACD
-            exp1 = df['close'].ewm(span=12).mean()
-            exp2 = df['close'].ewm(span=26).mean()
-            df['macd'] = exp1 - exp2
-            df['macd_signal'] = df['macd'].ewm(span=9).mean()
-            df['macd_histogram'] = df['macd'] - df['macd_signal']
+            df['macd'], df['macd_signal'], df['macd_histogram'] = indicators_nb.macd(close, 12, 26, 9)
             
             return df
             
@@ -242,13 +368,11 @@ class ChartAnalyzer:
             logger.error(f"Error calculating chart indicators: {e}")
             return df
             
-    async def generate_prediction_chart(self, predictions):
+    async def generate_prediction_chart(self, predictions, render_format='png'):
         """Generate prediction visualization"""
         try:
             # Get current data
-            ohlcv = self.exchange.fetch_ohlcv('BTC/USDT', '1h', limit=24)
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+            df = await self._load_ohlcv('BTC/USDT', '1h', 24)
             
             # Create future timestamps
             last_time = df['timestamp'].iloc[-1]
@@ -265,6 +389,12 @@ class ChartAnalyzer:
                 float(predictions['24h']['price'])
             ]
             
+            cache_name = ('predictions', render_format)
+            cache_key = ('BTC/USDT', '1h') + self._bar_key(df) + tuple(pred_prices)
+            cached = self._cached_chart(cache_name, cache_key)
+            if cached is not None:
+                return cached
+            
             fig = go.Figure()
             
             # Add historical price
@@ -312,12 +442,9 @@ class ChartAnalyzer:
             )
             
             # Save prediction chart
-            os.makedirs('data/charts', exist_ok=True)
-            pred_path = f'data/charts/btcusdt_predictions_{datetime.now().strftime("%Y%m%d_%H%M")}.png'
-            fig.write_image(pred_path, width=1000, height=500)
-            
-            return pred_path
+            pred_path = 'data/charts/btcusdt_predictions.png'
+            return await self._export(fig, pred_path, 1000, 500, render_format, cache_name, cache_key)
             
         except Exception as e:
             logger.error(f"Error generating prediction chart: {e}")
-            return None
+            return await self.generate_error_chart(render_format)
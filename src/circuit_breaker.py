@@ -0,0 +1,42 @@
+"""
+Circuit Breaker - Minimal breaker for coroutines on a single event loop
+"""
+
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the breaker is open"""
+
+
+class AsyncCircuitBreaker:
+    # Only touched from the event loop thread, so plain attributes need no locking
+    __slots__ = ('name', 'fail_max', 'reset_timeout', 'failures', 'open_until')
+
+    def __init__(self, name, fail_max=3, reset_timeout=60):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.open_until = 0.0
+
+    async def call(self, func, *args, **kwargs):
+        """Await func(*args, **kwargs), opening the breaker after fail_max consecutive failures"""
+        # Once reset_timeout has passed the breaker is half-open: calls go through,
+        # and the first failure reopens it straight away
+        half_open = bool(self.open_until)
+        if half_open and time.monotonic() < self.open_until:
+            raise CircuitOpenError(f"{self.name} unavailable after repeated failures")
+
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            self.failures += 1
+            if half_open or self.failures >= self.fail_max:
+                self.open_until = time.monotonic() + self.reset_timeout
+                self.failures = 0
+            raise
+
+        self.failures = 0
+        self.open_until = 0.0
+        return result
@@ -1,19 +1,44 @@
-import ccxt
+import asyncio
+import ccxt.async_support as ccxt
 import logging
+from .circuit_breaker import AsyncCircuitBreaker
 from .database import DatabaseManager
 
 logger = logging.getLogger(__name__)
 
 class DataCollector:
-    def __init__(self):
-        self.exchange = ccxt.binance()
-        self.db = DatabaseManager()
+    def __init__(self, exchange=None, db=None, executor=None):
+        # Only close the exchange and database on shutdown if this collector created them
+        self._owns_exchange = exchange is None
+        self._owns_db = db is None
+        self.exchange = exchange if exchange is not None else ccxt.binance({'enableRateLimit': True})
+        self.db = db if db is not None else DatabaseManager()
+        self.executor = executor
+        # Stop hammering the exchange after repeated failures; the reset window spans
+        # several 5-minute collection ticks so an open breaker actually skips some
+        self.breaker = AsyncCircuitBreaker('Exchange OHLCV', reset_timeout=900)
+        
+    async def aclose(self):
+        """Close the exchange session and database connection it owns"""
+        if self._owns_exchange:
+            await self.exchange.close()
+        if self._owns_db:
+            self.db.close()
 
     async def collect_btc_data(self, symbol="BTC/USDT", timeframe="1h", limit=100):
-        """Fetch market data from the exchange and store it"""
+        """Fetch market data from the exchange, store it and return the raw candles"""
         try:
-            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-            self.db.store_market_data(symbol, timeframe, ohlcv)
+            ohlcv = await self.breaker.call(self.exchange.fetch_ohlcv, symbol, timeframe, limit=limit)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self.db.store_market_data, symbol, timeframe, ohlcv)
+            # Callers can read prices from the fetched rows without a database round trip
+            return ohlcv
         except Exception as e:
             logger.error(f"Error collecting market data: {e}")
+            return None
 
+    async def collect_many(self, requests):
+        """Collect several (symbol, timeframe, limit) series concurrently over the shared session"""
+        return await asyncio.gather(
+            *(self.collect_btc_data(symbol, timeframe, limit) for symbol, timeframe, limit in requests)
+        )
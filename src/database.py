@@ -3,31 +3,55 @@ Database Manager - Handles data storage and retrieval
 """
 
 import sqlite3
-import json
+import orjson
 import pandas as pd
-from datetime import datetime
 import logging
 import os
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Database files whose schema and migrations have already run in this process
+_INITIALIZED = set()
+_INIT_LOCK = threading.Lock()
+
 class DatabaseManager:
     def __init__(self, db_path='data/trading_bot.db'):
         self.db_path = db_path
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self.init_database()
+        with _INIT_LOCK:
+            first_open = db_path not in _INITIALIZED
+            if first_open:
+                os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            # One connection shared by all calls; the lock serialises access across threads
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._lock = threading.Lock()
+            if first_open:
+                self.init_database()
+            else:
+                # Schema, indices and WAL mode persist in the file; only per-connection settings remain
+                self._conn.execute('PRAGMA synchronous=NORMAL')
+        
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
         
     def init_database(self):
         """Initialize database with required tables"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self._lock, self._conn:
+                cursor = self._conn.cursor()
+                
+                # WAL lets readers proceed during writes and makes commits cheaper
+                cursor.execute('PRAGMA journal_mode=WAL')
+                cursor.execute('PRAGMA synchronous=NORMAL')
                 
                 # Market data table
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS market_data (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp DATETIME,
+                        timestamp INTEGER NOT NULL, -- epoch milliseconds
                         symbol TEXT,
                         timeframe TEXT,
                         open REAL,
@@ -43,7 +67,7 @@ class DatabaseManager:
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS analysis_results (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp DATETIME,
+                        timestamp INTEGER NOT NULL, -- epoch milliseconds
                         analysis_type TEXT,
                         result TEXT, -- JSON string
                         confidence INTEGER,
@@ -83,7 +107,7 @@ class DatabaseManager:
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS trading_signals (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp DATETIME,
+                        timestamp INTEGER NOT NULL, -- epoch milliseconds
                         signal_type TEXT, -- buy/sell/hold
                         entry_price REAL,
                         exit_price REAL,
@@ -95,7 +119,42 @@ class DatabaseManager:
                     )
                 ''')
                 
-                conn.commit()
+                # Older databases stored timestamps as local-time ISO text; convert them
+                # to UTC epoch ms ('utc' treats the stored text as local time)
+                for table in ('market_data', 'analysis_results', 'trading_signals'):
+                    cursor.execute(f'''
+                        UPDATE OR REPLACE {table}
+                        SET timestamp = CAST(strftime('%s', timestamp, 'utc') AS INTEGER) * 1000
+                        WHERE typeof(timestamp) = 'text'
+                    ''')
+                
+                # Indices for the hot read paths. The unique market_data key makes
+                # INSERT OR REPLACE upsert candles instead of duplicating them.
+                cursor.execute('''
+                    SELECT 1 FROM sqlite_master
+                    WHERE type = 'index' AND name = 'idx_market_sym_tf_ts'
+                ''')
+                if cursor.fetchone() is None:
+                    cursor.execute('''
+                        DELETE FROM market_data WHERE id NOT IN (
+                            SELECT MAX(id) FROM market_data
+                            GROUP BY symbol, timeframe, timestamp
+                        )
+                    ''')
+                cursor.execute('''
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_market_sym_tf_ts
+                    ON market_data(symbol, timeframe, timestamp DESC)
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_analysis_type_ts
+                    ON analysis_results(analysis_type, timestamp DESC)
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_signals_status_ts
+                    ON trading_signals(status, timestamp DESC)
+                ''')
+                
+                _INITIALIZED.add(self.db_path)
                 logger.info("Database initialized successfully")
                 
         except Exception as e:
@@ -104,18 +163,19 @@ class DatabaseManager:
     def store_market_data(self, symbol, timeframe, ohlcv_data):
         """Store market data in database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self._lock, self._conn:
+                cursor = self._conn.cursor()
                 
-                for candle in ohlcv_data:
-                    timestamp = datetime.fromtimestamp(candle[0] / 1000)
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO market_data 
-                        (timestamp, symbol, timeframe, open, high, low, close, volume)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (timestamp, symbol, timeframe, candle[1], candle[2], candle[3], candle[4], candle[5]))
+                rows = [
+                    (int(candle[0]), symbol, timeframe, candle[1], candle[2], candle[3], candle[4], candle[5])
+                    for candle in ohlcv_data
+                ]
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO market_data 
+                    (timestamp, symbol, timeframe, open, high, low, close, volume)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
                 
-                conn.commit()
                 logger.info(f"Stored {len(ohlcv_data)} candles for {symbol} {timeframe}")
                 
         except Exception as e:
@@ -124,35 +184,48 @@ class DatabaseManager:
     def get_market_data(self, symbol, timeframe, limit=100):
         """Retrieve market data from database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                query = '''
-                    SELECT timestamp, open, high, low, close, volume
-                    FROM market_data
-                    WHERE symbol = ? AND timeframe = ?
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                '''
-                df = pd.read_sql_query(query, conn, params=(symbol, timeframe, limit))
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                return df.sort_values('timestamp').reset_index(drop=True)
+            with self._lock, self._conn:
+                cursor = self._conn.cursor()
+                
+                # Latest `limit` candles, returned oldest first
+                cursor.execute('''
+                    SELECT timestamp, open, high, low, close, volume FROM (
+                        SELECT timestamp, open, high, low, close, volume
+                        FROM market_data
+                        WHERE symbol = ? AND timeframe = ?
+                        ORDER BY timestamp DESC
+                        LIMIT ?
+                    ) ORDER BY timestamp ASC
+                ''', (symbol, timeframe, limit))
+                rows = cursor.fetchall()
+                
+            df = pd.DataFrame.from_records(rows, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+            df['timestamp'] = pd.to_datetime(df['timestamp'].to_numpy(dtype='int64'), unit='ms')
+            return df
                 
         except Exception as e:
             logger.error(f"Error retrieving market data: {e}")
             return None
             
+    @staticmethod
+    def _encode_result(result):
+        """Serialize an analysis result to JSON text for the result column"""
+        return orjson.dumps(
+            result, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS, default=str
+        ).decode()
+        
     def store_analysis_result(self, analysis_type, result, confidence):
         """Store analysis results"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self._lock, self._conn:
+                cursor = self._conn.cursor()
                 
                 cursor.execute('''
                     INSERT INTO analysis_results 
                     (timestamp, analysis_type, result, confidence)
                     VALUES (?, ?, ?, ?)
-                ''', (datetime.now(), analysis_type, json.dumps(result), confidence))
+                ''', (int(time.time() * 1000), analysis_type, self._encode_result(result), confidence))
                 
-                conn.commit()
                 logger.info(f"Stored {analysis_type} analysis result")
                 
         except Exception as e:
@@ -161,8 +234,8 @@ class DatabaseManager:
     def get_latest_analysis(self, analysis_type, limit=1):
         """Get latest analysis results"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self._lock, self._conn:
+                cursor = self._conn.cursor()
                 
                 cursor.execute('''
                     SELECT timestamp, result, confidence
@@ -178,7 +251,7 @@ class DatabaseManager:
                 for row in results:
                     parsed_results.append({
                         'timestamp': row[0],
-                        'result': json.loads(row[1]),
+                        'result': orjson.loads(row[1]),
                         'confidence': row[2]
                     })
                     
@@ -191,8 +264,8 @@ class DatabaseManager:
     def store_research_data(self, source, title, content, url, sentiment, relevance_score):
         """Store research data"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self._lock, self._conn:
+                cursor = self._conn.cursor()
                 
                 cursor.execute('''
                     INSERT INTO research_data
@@ -200,7 +273,6 @@ class DatabaseManager:
                     VALUES (?, ?, ?, ?, ?, ?)
                 ''', (source, title, content, url, sentiment, relevance_score))
 
-                conn.commit()
                 logger.info(f"Stored research data from {source}")
 
         except Exception as e:
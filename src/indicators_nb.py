@@ -0,0 +1,176 @@
+"""
+Indicators - Numba-compiled single-pass kernels for chart indicators and downsampling
+"""
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def sma(x, n):
+    """Simple moving average using a running window sum"""
+    out = np.full(x.shape[0], np.nan)
+    s = 0.0
+    for i in range(x.shape[0]):
+        s += x[i]
+        if i >= n:
+            s -= x[i - n]
+        if i >= n - 1:
+            out[i] = s / n
+    return out
+
+
+@njit(cache=True)
+def ema(x, span):
+    """Exponential moving average (matches pandas ewm(span=...).mean())"""
+    out = np.empty(x.shape[0])
+    decay = 1.0 - 2.0 / (span + 1.0)
+    num = 0.0
+    den = 0.0
+    for i in range(x.shape[0]):
+        num = x[i] + decay * num
+        den = 1.0 + decay * den
+        out[i] = num / den
+    return out
+
+
+@njit(cache=True, error_model='numpy')
+def rsi(x, n):
+    """Relative Strength Index with Wilder smoothing and a branchless gain/loss split"""
+    out = np.full(x.shape[0], np.nan)
+    avg_up = 0.0
+    avg_dn = 0.0
+    for i in range(1, x.shape[0]):
+        d = x[i] - x[i - 1]
+        ad = abs(d)
+        up = (d + ad) * 0.5
+        dn = (ad - d) * 0.5
+        if i <= n:
+            # Seed with the simple mean of the first n moves
+            avg_up += up / n
+            avg_dn += dn / n
+        else:
+            avg_up += (up - avg_up) / n
+            avg_dn += (dn - avg_dn) / n
+        if i >= n:
+            # Equivalent to 100 - 100 / (1 + avg_up / avg_dn)
+            out[i] = 100.0 * avg_up / (avg_up + avg_dn)
+    return out
+
+
+@njit(cache=True)
+def window_stats(close, high, low, n):
+    """Rolling mean/std of close and rolling max of high / min of low in one pass"""
+    size = close.shape[0]
+    mean_out = np.full(size, np.nan)
+    std_out = np.full(size, np.nan)
+    hi_out = np.full(size, np.nan)
+    lo_out = np.full(size, np.nan)
+    # Monotonic deques of indices: decreasing highs, increasing lows
+    hi_q = np.empty(size, dtype=np.int32)
+    lo_q = np.empty(size, dtype=np.int32)
+    hi_head = hi_tail = 0
+    lo_head = lo_tail = 0
+    s = 0.0
+    s2 = 0.0
+    for i in range(size):
+        s += close[i]
+        s2 += close[i] * close[i]
+        if i >= n:
+            s -= close[i - n]
+            s2 -= close[i - n] * close[i - n]
+
+        while hi_tail > hi_head and high[hi_q[hi_tail - 1]] <= high[i]:
+            hi_tail -= 1
+        hi_q[hi_tail] = i
+        hi_tail += 1
+        if hi_q[hi_head] <= i - n:
+            hi_head += 1
+
+        while lo_tail > lo_head and low[lo_q[lo_tail - 1]] >= low[i]:
+            lo_tail -= 1
+        lo_q[lo_tail] = i
+        lo_tail += 1
+        if lo_q[lo_head] <= i - n:
+            lo_head += 1
+
+        if i >= n - 1:
+            mean = s / n
+            mean_out[i] = mean
+            std_out[i] = np.sqrt(max((s2 - s * mean) / (n - 1), 0.0))
+            hi_out[i] = high[hi_q[hi_head]]
+            lo_out[i] = low[lo_q[lo_head]]
+    return mean_out, std_out, hi_out, lo_out
+
+
+@njit(cache=True)
+def macd(x, fast, slow, signal):
+    """MACD line, signal line and histogram"""
+    line = ema(x, fast) - ema(x, slow)
+    sig = ema(line, signal)
+    return line, sig, line - sig
+
+
+@njit(cache=True)
+def lttb_indices(y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out points preserving the shape of y"""
+    n = y.shape[0]
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    every = (n - 2) / (n_out - 2)
+    a = 0
+    for i in range(n_out - 2):
+        # Average point of the next bucket
+        start = int((i + 1) * every) + 1
+        end = min(int((i + 2) * every) + 1, n)
+        avg_x = 0.0
+        avg_y = 0.0
+        for j in range(start, end):
+            avg_x += j
+            avg_y += y[j]
+        avg_x /= end - start
+        avg_y /= end - start
+
+        # Point in the current bucket forming the largest triangle with a and the average
+        best_area = -1.0
+        best = start - 1
+        for j in range(int(i * every) + 1, start):
+            area = abs((a - avg_x) * (y[j] - y[a]) - (a - j) * (avg_y - y[a]))
+            if area > best_area:
+                best_area = area
+                best = j
+        out[i + 1] = best
+        a = best
+    out[n_out - 1] = n - 1
+    return out
+
+
+@njit(cache=True)
+def pivots(high, low, close):
+    """Classic pivot point with first resistance and support levels"""
+    size = close.shape[0]
+    pivot = np.empty(size)
+    r1 = np.empty(size)
+    s1 = np.empty(size)
+    for i in range(size):
+        p = (high[i] + low[i] + close[i]) / 3.0
+        pivot[i] = p
+        r1[i] = 2.0 * p - low[i]
+        s1[i] = 2.0 * p - high[i]
+    return pivot, r1, s1
+
+
+@njit(cache=True)
+def blend_predictions(price, close_1h, close_4h, close_1d, rsi, macd_diff):
+    """1h/4h/24h price targets from multi-timeframe momentum, contrarian RSI and MACD"""
+    momentum_1h = (close_1h[-1] - close_1h[-12]) / close_1h[-12]
+    momentum_4h = (close_4h[-1] - close_4h[-6]) / close_4h[-6]
+    momentum_1d = (close_1d[-1] - close_1d[-7]) / close_1d[-7]
+    rsi_factor = (50.0 - rsi) / 100.0
+    macd_factor = np.tanh(macd_diff * 1000.0) * 0.02
+    pred_1h = price * (1.0 + momentum_1h * 0.3 + rsi_factor * 0.1 + macd_factor * 0.1)
+    pred_4h = price * (1.0 + momentum_4h * 0.5 + rsi_factor * 0.2 + macd_factor * 0.2)
+    pred_24h = price * (1.0 + momentum_1d * 0.7 + rsi_factor * 0.3 + macd_factor * 0.3)
+    return pred_1h, pred_4h, pred_24h
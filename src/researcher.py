@@ -4,19 +4,28 @@ AI Trading Researcher - Continuously learns from verified sources
 
 import asyncio
 import aiohttp
+import ccxt.async_support as ccxt
 import feedparser
-import requests
 from bs4 import BeautifulSoup
+from collections import deque
 from datetime import datetime, timedelta
-import json
+import orjson
 import os
+import re
 from typing import Dict, List
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Single-pass, case-insensitive substring match for relevant article titles
+_KEYWORD_RE = re.compile(r'bitcoin|btc|trading|analysis|prediction', re.IGNORECASE)
+_SENTIMENT_RE = re.compile(r'bullish|bearish', re.IGNORECASE)
+
 class TradingResearcher:
-    def __init__(self):
+    def __init__(self, exchange=None):
+        # Only close the exchange on shutdown if this researcher created it
+        self._owns_exchange = exchange is None
+        self.exchange = exchange if exchange is not None else ccxt.binance({'enableRateLimit': True})
         self.verified_sources = {
             'news': [
                 'https://cointelegraph.com/rss',
@@ -36,15 +45,46 @@ class TradingResearcher:
             ]
         }
         
+        self.ollama_url = "http://localhost:11434/api/generate"
+        self.model = "llama3.1:8b"
+        self.ollama_parallel = int(os.getenv('OLLAMA_NUM_PARALLEL', '4'))
+        
+        self._session = None
+        
         self.knowledge_base = {}
         self.load_knowledge_base()
         
+        # Bounded window of analyzed strategies, persisted apart from the knowledge base
+        self._recent_strategies = deque(maxlen=500)
+        self._strategies_total = 0
+        self._last_research_update = None
+        self.load_recent_strategies()
+        
+        # ETag / Last-Modified validators per feed URL for conditional GETs
+        self._feed_cache = {}
+        self.load_feed_cache()
+        
+    async def _get_session(self):
+        """Return the keep-alive HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=75)
+            )
+        return self._session
+        
+    async def aclose(self):
+        """Close the HTTP session and the exchange session it owns"""
+        if self._session is not None:
+            await self._session.close()
+        if self._owns_exchange:
+            await self.exchange.close()
+            
     def load_knowledge_base(self):
         """Load existing knowledge base"""
         try:
             if os.path.exists('data/knowledge_base.json'):
-                with open('data/knowledge_base.json', 'r') as f:
-                    self.knowledge_base = json.load(f)
+                with open('data/knowledge_base.json', 'rb') as f:
+                    self.knowledge_base = orjson.loads(f.read())
         except Exception as e:
             logger.error(f"Error loading knowledge base: {e}")
             self.knowledge_base = {}
@@ -53,24 +93,109 @@ class TradingResearcher:
         """Save knowledge base to file"""
         try:
             os.makedirs('data', exist_ok=True)
-            with open('data/knowledge_base.json', 'w') as f:
-                json.dump(self.knowledge_base, f, indent=2, default=str)
+            # Encode once in C (compact), then a single write
+            buf = orjson.dumps(
+                self.knowledge_base,
+                option=orjson.OPT_SERIALIZE_NUMPY,
+                default=str
+            )
+            with open('data/knowledge_base.json', 'wb') as f:
+                f.write(buf)
         except Exception as e:
             logger.error(f"Error saving knowledge base: {e}")
             
+    def load_recent_strategies(self):
+        """Load recent strategies, migrating any list still kept in the knowledge base"""
+        try:
+            if os.path.exists('data/recent_strategies.json'):
+                with open('data/recent_strategies.json', 'rb') as f:
+                    data = orjson.loads(f.read())
+                self._recent_strategies.extend(data.get('strategies', []))
+                self._strategies_total = data.get('total', len(self._recent_strategies))
+                self._last_research_update = data.get('last_research_update')
+        except Exception as e:
+            logger.error(f"Error loading recent strategies: {e}")
+            
+        legacy = self.knowledge_base.pop('strategies', None)
+        last_update = self.knowledge_base.pop('last_research_update', None)
+        if legacy and not self._recent_strategies:
+            self._recent_strategies.extend(legacy)
+            self._strategies_total = len(legacy)
+            self._last_research_update = last_update
+            self.save_recent_strategies()
+            self.save_knowledge_base()
+            
+    def save_recent_strategies(self):
+        """Save recent strategies to file"""
+        try:
+            os.makedirs('data', exist_ok=True)
+            buf = orjson.dumps(
+                {
+                    'strategies': list(self._recent_strategies),
+                    'total': self._strategies_total,
+                    'last_research_update': self._last_research_update
+                },
+                option=orjson.OPT_SERIALIZE_NUMPY,
+                default=str
+            )
+            with open('data/recent_strategies.json', 'wb') as f:
+                f.write(buf)
+        except Exception as e:
+            logger.error(f"Error saving recent strategies: {e}")
+            
+    def load_feed_cache(self):
+        """Load cached feed validators"""
+        try:
+            if os.path.exists('data/feed_cache.json'):
+                with open('data/feed_cache.json', 'rb') as f:
+                    self._feed_cache = orjson.loads(f.read())
+        except Exception as e:
+            logger.error(f"Error loading feed cache: {e}")
+            self._feed_cache = {}
+            
+    def save_feed_cache(self):
+        """Save feed validators to file"""
+        try:
+            os.makedirs('data', exist_ok=True)
+            with open('data/feed_cache.json', 'wb') as f:
+                f.write(orjson.dumps(self._feed_cache))
+        except Exception as e:
+            logger.error(f"Error saving feed cache: {e}")
+            
+    def fetch_feed(self, source):
+        """Fetch an RSS feed, returning None when the server reports it unchanged"""
+        validators = self._feed_cache.get(source, {})
+        feed = feedparser.parse(source, etag=validators.get('etag'), modified=validators.get('modified'))
+        if feed.get('status') == 304:
+            return None
+        if 'status' in feed:
+            self._feed_cache[source] = {'etag': feed.get('etag'), 'modified': feed.get('modified')}
+        return feed
+        
     async def research_new_strategies(self):
         """Research new trading strategies from verified sources"""
         logger.info("Starting strategy research...")
         
         strategies = []
         
-        # Collect from news sources
-        for source in self.verified_sources['news']:
+        # Collect from news sources, fetched concurrently with conditional GETs
+        sources = self.verified_sources['news']
+        feeds = await asyncio.gather(
+            *(asyncio.to_thread(self.fetch_feed, source) for source in sources),
+            return_exceptions=True
+        )
+        self.save_feed_cache()
+        
+        for source, feed in zip(sources, feeds):
+            if isinstance(feed, Exception):
+                logger.error(f"Error fetching from {source}: {feed}")
+                continue
+            if feed is None:
+                # 304 Not Modified: nothing new since the last cycle
+                continue
             try:
-                feed = feedparser.parse(source)
                 for entry in feed.entries[:5]:  # Latest 5 articles
-                    if any(keyword in entry.title.lower() for keyword in 
-                          ['bitcoin', 'btc', 'trading', 'analysis', 'prediction']):
+                    if _KEYWORD_RE.search(entry.title):
                         strategies.append({
                             'title': entry.title,
                             'summary': entry.summary if hasattr(entry, 'summary') else '',
@@ -85,15 +210,9 @@ class TradingResearcher:
         # Process and analyze strategies
         await self.process_strategies(strategies)
         
-    async def process_strategies(self, strategies: List[Dict]):
-        """Process and analyze new strategies using local LLM"""
-        try:
-            # Use local Ollama for analysis
-            import requests
-            
-            for strategy in strategies:
-                # Analyze with local LLM
-                prompt = f"""
+    async def analyze_strategy(self, session, semaphore, strategy: Dict):
+        """Analyze a single strategy with the local LLM"""
+        prompt = f"""
                 Analyze this trading-related content for BTCUSDT:
                 Title: {strategy['title']}
                 Summary: {strategy['summary']}
@@ -107,26 +226,36 @@ class TradingResearcher:
                 
                 Respond in JSON format.
                 """
-                
-                response = requests.post('http://localhost:11434/api/generate', json={
-                    'model': 'llama3.1:8b',
+        
+        try:
+            async with semaphore:
+                async with session.post(self.ollama_url, json={
+                    'model': self.model,
                     'prompt': prompt,
                     'stream': False
-                })
-                
-                if response.status_code == 200:
-                    analysis = response.json()['response']
-                    strategy['ai_analysis'] = analysis
+                }) as response:
+                    if response.status == 200:
+                        analysis = orjson.loads(await response.read())['response']
+                        strategy['ai_analysis'] = analysis
+        except Exception as e:
+            logger.error(f"Error analyzing strategy '{strategy['title']}': {e}")
+            
+    async def process_strategies(self, strategies: List[Dict]):
+        """Process and analyze new strategies using local LLM"""
+        try:
+            # Submit concurrently, bounded by the number of parallel Ollama slots.
+            # Shortest prompts go first so they don't queue behind long ones.
+            semaphore = asyncio.Semaphore(self.ollama_parallel)
+            ordered = sorted(strategies, key=lambda s: len(s['title']) + len(s['summary']))
+            session = await self._get_session()
+            await asyncio.gather(*(self.analyze_strategy(session, semaphore, s) for s in ordered))
                     
-            # Update knowledge base
-            timestamp = datetime.now().isoformat()
-            if 'strategies' not in self.knowledge_base:
-                self.knowledge_base['strategies'] = []
-                
-            self.knowledge_base['strategies'].extend(strategies)
-            self.knowledge_base['last_research_update'] = timestamp
+            # Only the bounded strategy window is rewritten each cycle
+            self._recent_strategies.extend(strategies)
+            self._strategies_total += len(strategies)
+            self._last_research_update = datetime.now().isoformat()
             
-            self.save_knowledge_base()
+            self.save_recent_strategies()
             logger.info(f"Processed {len(strategies)} new strategies")
             
         except Exception as e:
@@ -136,8 +265,9 @@ class TradingResearcher:
         """Get current market sentiment from multiple sources"""
         try:
             # Fear & Greed Index
-            response = requests.get('https://api.alternative.me/fng/')
-            fear_greed = response.json()['data'][0] if response.status_code == 200 else None
+            session = await self._get_session()
+            async with session.get('https://api.alternative.me/fng/') as response:
+                fear_greed = orjson.loads(await response.read())['data'][0] if response.status == 200 else None
             
             # Social sentiment (simplified)
             sentiment_data = {
@@ -165,9 +295,11 @@ class TradingResearcher:
     async def update_knowledge_base(self):
         """Update knowledge base with latest market data"""
         try:
-            # Get latest market data
-            market_data = await self.get_latest_market_data()
-            sentiment = await self.get_market_sentiment()
+            # Get latest market data and sentiment concurrently
+            market_data, sentiment = await asyncio.gather(
+                self.get_latest_market_data(),
+                self.get_market_sentiment()
+            )
             
             # Update knowledge base
             self.knowledge_base['market_data'] = market_data
@@ -183,11 +315,9 @@ class TradingResearcher:
     async def get_latest_market_data(self):
         """Get latest BTCUSDT market data"""
         try:
-            # Binance API for real-time data
-            response = requests.get('https://api.binance.com/api/v3/ticker/24hr?symbol=BTCUSDT')
-            if response.status_code == 200:
-                return response.json()
-            return None
+            # Raw Binance 24h ticker through the shared exchange session
+            ticker = await self.exchange.fetch_ticker('BTC/USDT')
+            return ticker['info']
         except Exception as e:
             logger.error(f"Error getting market data: {e}")
             return None
@@ -195,7 +325,7 @@ class TradingResearcher:
     async def get_latest_findings(self):
         """Get latest research findings for telegram bot"""
         try:
-            if not self.knowledge_base:
+            if not self.knowledge_base and not self._recent_strategies:
                 return {
                     'news_impact': 'No recent data available',
                     'patterns': 'Analyzing...',
@@ -205,7 +335,7 @@ class TradingResearcher:
                 }
                 
             # Extract latest findings
-            latest_strategies = self.knowledge_base.get('strategies', [])[-3:]  # Last 3
+            latest_strategies = list(self._recent_strategies)[-3:]  # Last 3
             market_data = self.knowledge_base.get('market_data', {})
             sentiment = self.knowledge_base.get('sentiment', {})
             
@@ -234,8 +364,13 @@ class TradingResearcher:
         if not strategies:
             return "No recent news analyzed"
             
-        bullish_count = sum(1 for s in strategies if 'bullish' in str(s).lower())
-        bearish_count = sum(1 for s in strategies if 'bearish' in str(s).lower())
+        # One regex pass over each strategy's text fields; a source counts once per side
+        bullish_count = bearish_count = 0
+        for s in strategies:
+            text = f"{s.get('title', '')} {s.get('summary', '')} {s.get('ai_analysis', '')}"
+            found = {m.lower() for m in _SENTIMENT_RE.findall(text)}
+            bullish_count += 'bullish' in found
+            bearish_count += 'bearish' in found
         
         if bullish_count > bearish_count:
             return f"📈 Bullish sentiment from {len(strategies)} sources"
@@ -272,5 +407,5 @@ class TradingResearcher:
         
     def get_performance_metrics(self):
         """Get performance metrics"""
-        total_strategies = len(self.knowledge_base.get('strategies', []))
+        total_strategies = self._strategies_total
         return f"📈 {total_strategies} strategies analyzed\n🎯 Knowledge base growing"